@@ -8,20 +8,57 @@ import numpy as np
 # import pyipopt
 from sklearn.linear_model.base import BaseEstimator, LinearClassifierMixin
 from sklearn.utils.validation import check_X_y, check_array, check_is_fitted
-from scipy import optimize
+from scipy import linalg, optimize
+from scipy.linalg import blas
+from scipy.special import expit
 # from ipopt import minimize_ipopt
 import time
 
 
+# number of rows of X per block when the Hessian is accumulated.
+_HESS_BLOCK_SIZE = 512
+
+
 # Define some useful function for chebyshev_greedy_algorithm_path and _cga_hdic_trim
 def logistic(X, beta):
-    lterm = X@beta
-    lterm[lterm < 50.0] = np.exp(lterm[lterm < 50.0]) / (1+np.exp(lterm[lterm < 50.0]))
-    lterm[lterm >= 50.0] = 1.0
-    return lterm
+    return expit(X @ beta)
+
+
+def _linear_predictor(X, beta, fit_intercept):
+    # beta[0] is the intercept if fit_intercept is True, so X never needs a column of ones.
+    if fit_intercept:
+        return X @ beta[1:] + beta[0]
+    return X @ beta
+
+
+def _active_columns(X, model, fit_intercept):
+    # the indices in model count the intercept as the 0-th regressor if fit_intercept is True,
+    # and the intercept is always the first entry of model.
+    return X[:, model[int(fit_intercept):] - int(fit_intercept)]
+
+
+def _coordinate_newton_step(x, p, y):
+    # one Newton step of the logistic loss in the coefficient of the regressor x, from the point where the
+    # fitted probabilities are p and the other coefficients are held fixed.
+    hess = (p * (1 - p)) @ x ** 2
+    return -((p - y) @ x) / hess if hess > 0 else 0.0
+
 
+def _weighted_gram(X, w):
+    """compute X.T @ diag(w) @ X for nonnegative weights w."""
+    (n, k) = X.shape
+    H = np.zeros((k, k), order='F')
+    if k == 0:
+        return H
+    sw = np.sqrt(w)
+    # accumulate the lower triangle of (sw X).T (sw X) block by block with the symmetric rank-k update.
+    for start in range(0, n, _HESS_BLOCK_SIZE):
+        X_block = sw[start:start + _HESS_BLOCK_SIZE, None] * X[start:start + _HESS_BLOCK_SIZE]
+        H = blas.dsyrk(1.0, X_block, beta=1.0, c=H, trans=1, lower=1, overwrite_c=1)
+    return H + np.tril(H, -1).T
 
-def _logistic_loss(X, y):
+
+def _logistic_loss(X, y, fit_intercept=False):
     """Given input data X and labels y, create the log-likelihood function.
 
     Parameters
@@ -30,6 +67,8 @@ def _logistic_loss(X, y):
         Training vector, where n_samples is the number of samples and n_features is the number of features.
     y : nd-array, shape (n_samples,)
         Target vector relative to X.
+    fit_intercept : bool, default: False
+        Whether the first coefficient is an intercept. In this case beta has length n_features + 1.
 
     Returns
     -------
@@ -39,14 +78,13 @@ def _logistic_loss(X, y):
     n = X.shape[0]
 
     def loss(beta):
-            pterm = X @ beta
-            pterm[pterm < 50.0] = np.log(1 + np.exp(pterm[pterm < 50.0]))
-            return np.sum(pterm/n) - (y @ X @ beta)/n
+        z = _linear_predictor(X, beta, fit_intercept)
+        return np.logaddexp(0.0, z).mean() - (y @ z) / n
 
     return loss
 
 
-def _logistic_grad_hess(X, y):
+def _logistic_grad_hess(X, y, fit_intercept=False, hessp=False):
     """Given input data X and labels y, create the gradient and the Hessian of the log-likelihood function.
 
     Parameters
@@ -55,21 +93,102 @@ def _logistic_grad_hess(X, y):
         Training vector, where n_samples is the number of samples and n_features is the number of features.
     y : nd-array, shape (n_samples,)
         Target vector relative to X.
+    fit_intercept : bool, default: False
+        Whether the first coefficient is an intercept. In this case beta has length n_features + 1.
+    hessp : bool, default: False
+        Whether to create the product of the Hessian with a vector instead of the Hessian itself.
 
     Returns
     -------
     grad : callable
         the gradient of the logistic loss given X and y.
     hess : callable
-        the Hessian of the logistic loss given X and y.
+        the Hessian of the logistic loss given X and y, or its product with an arbitrary vector,
+        hess(beta, v), if hessp is True.
     """
     n = X.shape[0]
+    # the solvers evaluate grad and hess at the same point, so keep the last sigmoid around.
+    cache = {'beta': None, 'p': None}
+
+    def sigmoid(beta):
+        if cache['beta'] is None or not np.array_equal(cache['beta'], beta):
+            cache['beta'] = np.array(beta, copy=True)
+            cache['p'] = expit(_linear_predictor(X, beta, fit_intercept))
+        return cache['p']
+
+    def grad(beta):
+        r = sigmoid(beta) - y
+        if fit_intercept:
+            return np.r_[r.sum(), r @ X] / n
+        return r @ X / n
+
+    if hessp:
+        def hess(beta, v):
+            p = sigmoid(beta)
+            wv = p * (1 - p) * _linear_predictor(X, v, fit_intercept)
+            if fit_intercept:
+                return np.r_[wv.sum(), wv @ X] / n
+            return wv @ X / n
+
+        return grad, hess
+
+    def hess(beta):
+        p = sigmoid(beta)
+        w = p * (1 - p)
+        H = _weighted_gram(X, w) / n
+        if fit_intercept:
+            wX = w @ X / n
+            H = np.block([[np.atleast_2d(w.sum() / n), wX[None, :]], [wX[:, None], H]])
+        return H
 
-    def grad(beta): return (logistic(X, beta) - y) @ X / n
+    return grad, hess
 
-    def hess(beta): return X.T * (logistic(X, beta) * (1-logistic(X, beta))) @ X / n
 
-    return grad, hess
+def _selection_grad(X, backend='numpy'):
+    """Given input data X, create the gradient of the logistic loss used by CGA to choose the next regressor.
+
+    Only the position of the largest entry of the gradient matters, so it is computed in single precision,
+    which halves the memory traffic of the product with the full X.
+
+    Parameters
+    ----------
+    X : nd-array, shape (n_samples, n_features)
+        Training vector, where n_samples is the number of samples and n_features is the number of features.
+    backend : str, {'numpy', 'cupy'}, default: 'numpy'
+        Where to keep X and compute the product. 'cupy' requires CuPy and a GPU.
+
+    Returns
+    -------
+    grad : callable
+        grad(r) is the gradient up to the factor 1/n_samples, given the residual r = sigmoid(X @ beta) - y.
+    """
+    if backend == 'cupy':
+        import cupy as cp
+        X_sel = cp.asarray(X, dtype=cp.float32)
+
+        def grad(r): return cp.asnumpy(cp.asarray(r, dtype=cp.float32) @ X_sel)
+
+        return grad
+
+    # stored column-major, so that sgemv reads X_sel.T @ r without copying it.
+    X_sel = np.asfortranarray(X, dtype=np.float32)
+
+    def grad(r): return blas.sgemv(1.0, X_sel, r, trans=1)
+
+    return grad
+
+
+# penalty per free parameter of the information criteria, with and without the high dimensional factor.
+_HD_PENALTY = {
+    'HQIC': lambda n, p: 2.0 * np.log(np.log(n)) * np.log(p),
+    'AIC': lambda n, p: 2.0 * np.log(p),
+    'BIC': lambda n, p: np.log(n) * np.log(p),
+}
+_PENALTY = {
+    'HQIC': lambda n: np.log(np.log(n)),
+    'AIC': lambda n: 2.0,
+    'BIC': lambda n: np.log(n),
+}
 
 
 def _hd_information_criterion(ic, loss, k, wn, n, p):
@@ -78,9 +197,9 @@ def _hd_information_criterion(ic, loss, k, wn, n, p):
     ----------
     ic : str, {'HQIC', 'AIC', 'BIC'}
         The information criterion for model selection.
-    loss : float
+    loss : float or nd-array
         the negative maximized value of the likelihood function of the model.
-    k : int
+    k : int or nd-array
         the number of free parameters to be estimated.
     wn : float
         the tuning parameter for the penalty term.
@@ -91,16 +210,10 @@ def _hd_information_criterion(ic, loss, k, wn, n, p):
 
     Returns
     -------
-    val : float
+    val : float or nd-array
         the value of the chosen information criterion given the loss and parameters.
     """
-    val = 0.0
-    if ic is 'HQIC':
-        val = 2.0 * n * loss + 2.0 * k * wn * np.log(np.log(n)) * np.log(p)
-    elif ic is 'AIC':
-        val = 2.0 * n * loss + 2.0 * k * wn * np.log(p)
-    elif ic is 'BIC':
-        val = 2.0 * n * loss + k * wn * np.log(n) * np.log(p)
+    val = 2.0 * n * loss + k * wn * _HD_PENALTY[ic](n, p)
     return val
 
 
@@ -122,16 +235,14 @@ def _information_criterion(ic, loss, k, n):
     val : float
         the value of the chosen information criterion given the loss and parameters.
     """
-    val = 0
-    if ic is 'HQIC':
-        val = 2.0 * n * loss + k * np.log(np.log(n))
-    elif ic is 'AIC':
-        val = 2.0 * n * loss + 2.0 * k
-    elif ic is 'BIC':
-        val = 2.0 * n * loss + k * np.log(n)
+    val = 2.0 * n * loss + k * _PENALTY[ic](n)
     return val
 
 
+# solvers of scipy.optimize.minimize that only need Hessian-vector products.
+_HESSP_METHODS = ('Newton-CG', 'trust-ncg', 'trust-krylov')
+
+
 def _minimize(loss, x0, method, jac, hess, tol, options):
     # if method is 'pyipopt':
     #     pyipopt.set_loglevel(0)
@@ -141,39 +252,36 @@ def _minimize(loss, x0, method, jac, hess, tol, options):
     #     res = minimize_ipopt(loss, x0, jac=jac)
     #     return res.x, res.fun
     # else:
-    res = optimize.minimize(loss, x0, method=method, jac=jac, hess=hess, tol=tol, options=options)
+    # hess is the Hessian-vector product for the methods in _HESSP_METHODS, see _logistic_grad_hess.
+    if method in _HESSP_METHODS:
+        res = optimize.minimize(loss, x0, method=method, jac=jac, hessp=hess, tol=tol, options=options)
+    else:
+        res = optimize.minimize(loss, x0, method=method, jac=jac, hess=hess, tol=tol, options=options)
     return res.x, res.fun
 
 
-def chebyshev_greedy_algorithm_path(X, y, ic='HQIC', wn=1.0, fit_intercept=True, kn=3.0, method='dogleg',
-                                    tol=1e-8, options=None):
-    """compute the path of Chebyshev greedy algorithm.
+def _cga_path(X, y, fit_intercept, kn, method, tol, options, backend):
+    """compute the path of Chebyshev greedy algorithm. The path does not depend on the information criterion
+    and its tuning parameter, so it can be shared by all the values of ic and wn.
     Parameters
     ----------
     X : nd-array, shape (n_samples, n_features)
         Training vector, where n_samples is the number of samples and n_features is the number of features.
     y : nd-array, shape (n_samples,)
         Target vector relative to X.
-    ic : str, {'HQIC', 'AIC', 'BIC'}, default: 'HQIC'
-        The information criterion for model selection.
-    wn : float, default: 1.0
-        the tuning parameter for the penalty term.
-    fit_intercept : bool, default: True
+    fit_intercept : bool
         Whether to fit an intercept for the model. In this case the length of the returned array is n_features + 1.
         Also the parameter index will be added by one.
-    kn : float, default: 3.0
+    kn : float
         the tuning parameter for the number of iteration.
-    method : str, {'dogleg', 'trust-ncg', 'Newton-CG'}, default: 'dogleg'
+    method : str, {'dogleg', 'trust-ncg', 'Newton-CG'}
         Type of solver.
-    tol : float, default: 1e-8
+    tol : float
         Tolerance for termination.
-    options : dict, optional
-        A dictionary of solver options. All methods accept the following generic options:
-            maxiter : int
-                Maximum number of iterations to perform.
-            disp : bool
-                Set to True to print convergence messages.
-        For method-specific options, see the document for scipy.optimize.minimize.
+    options : dict
+        A dictionary of solver options, see chebyshev_greedy_algorithm_path.
+    backend : str, {'numpy', 'cupy'}
+        Where to compute the gradient over all the regressors, see chebyshev_greedy_algorithm_path.
 
     Returns
     -------
@@ -182,63 +290,84 @@ def chebyshev_greedy_algorithm_path(X, y, ic='HQIC', wn=1.0, fit_intercept=True,
     path_cga : nd-array, shape (iter_cga,)
         The sequentially chosen regressors in each iteration. Note that if fit_intercept is True,
         the first term must be the intercept.
-    hdic_cga : nd-array, shape (iter_cga,)
-        The computed value of chosen information criterion in each iteration.
     iter_cga : int
         The total number of iterations of CGA.
     loss_path_cga : nd-array, shape (iter_cga,)
         The computed value of loss(the negative maximized value of the likelihood function) in each iteration.
     """
     # initialize the variables
+    # the intercept is kept out of X and counted as the 0-th regressor if fit_intercept is True.
     n = X.shape[0]
-    if fit_intercept:
-        X = np.c_[np.ones([n, 1]), X]
-    p = X.shape[1]
-    iter_cga = int(np.ceil(kn * np.sqrt(n / np.log(p))) + int(fit_intercept))
+    p = X.shape[1] + int(fit_intercept)
+    # there cannot be more steps than regressors, and more than n of them cannot be estimated.
+    iter_cga = int(min(n, p, np.ceil(kn * np.sqrt(n / np.log(p))) + int(fit_intercept)))
     beta_cga = np.zeros([p, iter_cga])
     path_cga = np.zeros(iter_cga, dtype=np.int)
-    hdic_cga = np.zeros(iter_cga)
     loss_path_cga = np.zeros(iter_cga)
-    loss_grad = _logistic_grad_hess(X, y)[0]
+    selection_grad = _selection_grad(X, backend)
+    # the chosen columns of X are copied once into a column-major buffer, so the design matrix of every step
+    # is a contiguous view of it instead of a fresh gather of all the chosen columns from X.
+    X_path = np.empty((n, iter_cga - int(fit_intercept)), order='F')
+    # the linear predictor X @ beta of the current model. Only the chosen regressors are nonzero,
+    # so it is updated from the active columns instead of the full X.
+    z = np.zeros(n)
 
     # the first step of CGA or estimation of intercept if fit_intercept is True.
     # choose the regressor that has maximal derivative.
-    path_cga[0] = 0 if fit_intercept else np.argmax(np.abs(loss_grad(beta_cga[:, 0])))
+    path_cga[0] = 0 if fit_intercept else np.argmax(np.abs(selection_grad(expit(z) - y)))
     # create the loss function and its gradient and Hessian with respect y and chosen regressors.
-    loss_cga = _logistic_loss(X[:, path_cga[0]].reshape(-1,1), y)
-    (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X[:, path_cga[0]].reshape(-1,1), y)
-    # set the initial value
-    x0 = beta_cga[0, 0:1]
+    if not fit_intercept:
+        X_path[:, 0] = X[:, path_cga[0]]
+    X_cga = X_path[:, 0:1-int(fit_intercept)]
+    loss_cga = _logistic_loss(X_cga, y, fit_intercept)
+    (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X_cga, y, fit_intercept, method in _HESSP_METHODS)
+    # set the initial value: the estimate of the intercept-only model is the log-odds of y, and a single
+    # regressor starts from a Newton step at zero.
+    if fit_intercept:
+        y_mean = y.mean()
+        beta_cga[0, 0] = np.log(y_mean / (1 - y_mean)) if 0 < y_mean < 1 else 0.0
+    else:
+        beta_cga[path_cga[0], 0] = _coordinate_newton_step(X_cga[:, 0], expit(z), y)
+    x0 = beta_cga[path_cga[0:1], 0]
     # use scipy.optimize.minimize to minimize the loss function given its gradient and Hessian.
-    (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol, options=options)
+    (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol,
+                                 options=options)
     # extract the result of the optimization.
     beta_cga[path_cga[0], 0] = res_x[0]
     loss_path_cga[0] = res_fun
-    # calculate the value of information criterion
-    hdic_cga[0] = _hd_information_criterion(ic, res_fun, 1, wn, n, p)
+    z = _linear_predictor(X_cga, res_x, fit_intercept)
 
     # The (iter_cga-1) steps of CGA
     for k in range(1, iter_cga):
         # choose the regressor that has maximal derivative but is not in the path_cga.
-        loss_grad_abs = np.abs(loss_grad(beta_cga[:, k - 1]))
-        loss_grad_abs[path_cga[0:k]] = -1
-        path_cga[k] = np.argmax(loss_grad_abs)
+        p_cga = expit(z)
+        loss_grad_abs = np.abs(selection_grad(p_cga - y))
+        loss_grad_abs[path_cga[int(fit_intercept):k] - int(fit_intercept)] = -1
+        path_cga[k] = np.argmax(loss_grad_abs) + int(fit_intercept)
         # create the loss function and its gradient and Hessian with respect y and chosen regressors.
-        loss_cga = _logistic_loss(X[:, path_cga[0:k+1]], y)
-        (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X[:, path_cga[0:k+1]], y)
-        # solve the optimization problem
+        X_path[:, k-int(fit_intercept)] = X[:, path_cga[k]-int(fit_intercept)]
+        X_cga = X_path[:, 0:k+1-int(fit_intercept)]
+        loss_cga = _logistic_loss(X_cga, y, fit_intercept)
+        (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X_cga, y, fit_intercept, method in _HESSP_METHODS)
+        # set the initial value: carry the estimate of the previous step forward, and take a Newton step
+        # in the new regressor.
+        beta_cga[:, k] = beta_cga[:, k-1]
+        beta_cga[path_cga[k], k] = _coordinate_newton_step(X_cga[:, -1], p_cga, y)
         x0 = beta_cga[path_cga[0:k+1], k]
-        (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol, options=options)
+        # solve the optimization problem
+        (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol,
+                                     options=options)
         # get the information
         beta_cga[path_cga[0:k+1], k] = res_x
         loss_path_cga[k] = res_fun
-        hdic_cga[k] = _hd_information_criterion(ic, res_fun, k+1, wn, n, p)
+        z = _linear_predictor(X_cga, res_x, fit_intercept)
 
-    return beta_cga, path_cga, hdic_cga, iter_cga, loss_path_cga
+    return beta_cga, path_cga, iter_cga, loss_path_cga
 
 
-def _cga_hdic_trim(X, y, ic, wn, fit_intercept, kn, method, tol, options, trimming):
-    """use the three stage method(CGA+HDIC+Trim) to compute the model.
+def chebyshev_greedy_algorithm_path(X, y, ic='HQIC', wn=1.0, fit_intercept=True, kn=3.0, method='dogleg',
+                                    tol=1e-8, options=None, backend='numpy'):
+    """compute the path of Chebyshev greedy algorithm.
     Parameters
     ----------
     X : nd-array, shape (n_samples, n_features)
@@ -265,6 +394,57 @@ def _cga_hdic_trim(X, y, ic, wn, fit_intercept, kn, method, tol, options, trimmi
             disp : bool
                 Set to True to print convergence messages.
         For method-specific options, see the document for scipy.optimize.minimize.
+    backend : str, {'numpy', 'cupy'}, default: 'numpy'
+        Where CGA computes the gradient over all the regressors to choose the next one. 'cupy' keeps a single
+        precision copy of X on the GPU; the estimation on the chosen regressors always runs on the CPU.
+
+    Returns
+    -------
+    beta_cga : nd-array, shape (n_features + fit_intercept, iter_cga)
+        the estimated coefficient in each iteration where iter_cga is the total number of iterations.
+    path_cga : nd-array, shape (iter_cga,)
+        The sequentially chosen regressors in each iteration. Note that if fit_intercept is True,
+        the first term must be the intercept.
+    hdic_cga : nd-array, shape (iter_cga,)
+        The computed value of chosen information criterion in each iteration.
+    iter_cga : int
+        The total number of iterations of CGA.
+    loss_path_cga : nd-array, shape (iter_cga,)
+        The computed value of loss(the negative maximized value of the likelihood function) in each iteration.
+    """
+    (beta_cga, path_cga, iter_cga, loss_path_cga) = _cga_path(X, y, fit_intercept, kn, method, tol, options,
+                                                              backend)
+    # calculate the value of information criterion in each iteration.
+    n = X.shape[0]
+    p = X.shape[1] + int(fit_intercept)
+    hdic_cga = _hd_information_criterion(ic, loss_path_cga, np.arange(1, iter_cga+1), wn, n, p)
+
+    return beta_cga, path_cga, hdic_cga, iter_cga, loss_path_cga
+
+
+def _hdic_trim(X, y, beta_cga, path_cga, iter_cga, loss_path_cga, ic, wn, fit_intercept, method, tol, options,
+               trimming):
+    """truncate the path of CGA by HDIC and trim the model, the last two stages of CGA+HDIC+Trim.
+    Parameters
+    ----------
+    X : nd-array, shape (n_samples, n_features)
+        Training vector, where n_samples is the number of samples and n_features is the number of features.
+    y : nd-array, shape (n_samples,)
+        Target vector relative to X.
+    beta_cga, path_cga, iter_cga, loss_path_cga :
+        The path of CGA computed by _cga_path.
+    ic : str, {'HQIC', 'AIC', 'BIC'}
+        The information criterion for model selection.
+    wn : float
+        the tuning parameter for the penalty term.
+    fit_intercept : bool
+        Whether the path of CGA includes an intercept.
+    method : str, {'dogleg', 'trust-ncg', 'Newton-CG'}
+        Type of solver.
+    tol : float
+        Tolerance for termination.
+    options : dict
+        A dictionary of solver options, see chebyshev_greedy_algorithm_path.
     trimming : bool
         Whether to trim the model.
 
@@ -289,53 +469,73 @@ def _cga_hdic_trim(X, y, ic, wn, fit_intercept, kn, method, tol, options, trimmi
     iter_cga : int
         The total number of iterations of CGA.
     """
-    # Check the shape of X and y, and initialize the variables
-    X = check_array(X)
     (n, p) = X.shape
     beta_hat = np.zeros(p+1) if fit_intercept else np.zeros(p)
 
-    # CGA
-    (beta_cga, path_cga, hdic_cga, iter_cga, loss_path_cga) = chebyshev_greedy_algorithm_path(
-        X, y, ic, wn, fit_intercept, kn, method, tol, options)
-    if fit_intercept:
-        X = np.c_[np.ones([n, 1]), X]
-
     # HDIC
+    # calculate the value of information criterion in each iteration.
+    hdic_cga = _hd_information_criterion(ic, loss_path_cga, np.arange(1, iter_cga+1), wn, n, p + int(fit_intercept))
     # truncate the path at the variable that has minimal high-dimensional information criterion
     k_hdic = np.argmin(hdic_cga)
     model = path_cga[0:k_hdic+1]
 
     # Trim
-    model_trim_list = list()
+    # gather the columns of the model once, the exclusion models are boolean masks of them.
+    X_model = _active_columns(X, model, fit_intercept)
+    in_model_trim = np.ones(model.shape[0], dtype=bool)
+    in_model_trim_k = np.ones(model.shape[0], dtype=bool)
     model_size = model.shape[0]
     # exclude the variable if the value high-dimensional information criterion of exclusion model
     # is lower than original model.
     if (model_size > 1) and trimming:
+        # screen the candidates with a quadratic model of the loss around the fitted model: fixing the k-th
+        # coefficient at zero raises the minimum of the model by 0.5 * (beta_k + d_k)^2 / inv(H)_kk, where
+        # d = -inv(H) g is the Newton step. One factorization of H serves all the candidates.
+        beta_model = beta_cga[model, k_hdic]
+        (loss_grad_model, loss_hess_model) = _logistic_grad_hess(X_model, y, fit_intercept)
+        g_model = loss_grad_model(beta_model)
+        try:
+            hess_inv = linalg.cho_solve(linalg.cho_factor(loss_hess_model(beta_model)), np.eye(model_size))
+            d_model = -hess_inv @ g_model
+            loss_trim_est = (loss_path_cga[k_hdic] + 0.5 * g_model @ d_model
+                             + 0.5 * (beta_model + d_model) ** 2 / np.diag(hess_inv))
+        except linalg.LinAlgError:
+            # the Hessian is numerically singular, so refit every candidate.
+            loss_trim_est = np.full(model_size, -np.inf)
+        hdic_trim_est = _hd_information_criterion(ic, loss_trim_est, k_hdic, wn, n, p)
         for k in range(int(fit_intercept), k_hdic+1):
+            # skip the exclusion model if the quadratic model already rejects it.
+            if hdic_trim_est[k] >= hdic_cga[k_hdic]:
+                continue
             # exclude the variable.
-            model_trim_k = np.delete(model, k)
+            in_model_trim_k[k] = False
             # create the loss function and its gradient and Hessian with respect the exclusion model.
-            loss_cga = _logistic_loss(X[:, model_trim_k], y)
-            (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X[:, model_trim_k], y)
+            X_trim_k = X_model[:, in_model_trim_k[int(fit_intercept):]]
+            loss_cga = _logistic_loss(X_trim_k, y, fit_intercept)
+            (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X_trim_k, y, fit_intercept, method in _HESSP_METHODS)
             # set the initial value.
-            x0 = beta_cga[model_trim_k, k_hdic]
+            x0 = beta_model[in_model_trim_k]
+            in_model_trim_k[k] = True
             # use scipy.optimize.minimize to minimize the loss function given its gradient and Hessian.
-            (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol, options=options)
+            (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol,
+                                         options=options)
             # calculate the value high-dimensional information criterion of exclusion model.
             hdic_trim = _hd_information_criterion(ic, res_fun, k_hdic, wn, n, p)
             # compare with the original model.
             if hdic_trim < hdic_cga[k_hdic]:
                 model_size -= 1
-                model_trim_list += [k]
+                in_model_trim[k] = False
     # get the trimming model
-    model_trim = np.delete(model, model_trim_list)
+    model_trim = model[in_model_trim]
 
     # if there is variable that is excluded, reestimate the trimming model.
     if model_size < model.shape[0]:
-        loss_cga = _logistic_loss(X[:, model_trim], y)
-        (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X[:, model_trim], y)
+        X_trim = X_model[:, in_model_trim[int(fit_intercept):]]
+        loss_cga = _logistic_loss(X_trim, y, fit_intercept)
+        (loss_grad_cga, loss_hess_cga) = _logistic_grad_hess(X_trim, y, fit_intercept, method in _HESSP_METHODS)
         x0 = beta_cga[model_trim, k_hdic]
-        (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol, options=options)
+        (res_x, res_fun) = _minimize(loss_cga, x0, method=method, jac=loss_grad_cga, hess=loss_hess_cga, tol=tol,
+                                     options=options)
         beta_hat[model_trim] = res_x
         loss = res_fun
     else:
@@ -361,6 +561,73 @@ def _cga_hdic_trim(X, y, ic, wn, fit_intercept, kn, method, tol, options, trimmi
     return intercept, coef, model_trim, loss, path_cga, intercept_cga, coef_cga, hdic_cga, iter_cga
 
 
+def _cga_hdic_trim(X, y, ic, wn, fit_intercept, kn, method, tol, options, trimming, backend):
+    """use the three stage method(CGA+HDIC+Trim) to compute the model.
+    Parameters
+    ----------
+    X : nd-array, shape (n_samples, n_features)
+        Training vector, where n_samples is the number of samples and n_features is the number of features.
+    y : nd-array, shape (n_samples,)
+        Target vector relative to X.
+    ic : str, {'HQIC', 'AIC', 'BIC'}, default: 'HQIC'
+        The information criterion for model selection.
+    wn : float, default: 1.0
+        the tuning parameter for the penalty term.
+    fit_intercept : bool, default: True
+        Whether to fit an intercept for the model. In this case the length of the returned array is n_features + 1.
+        Also the parameter index will be added by one.
+    kn : float, default: 3.0
+        the tuning parameter for the number of iteration.
+    method : str, {'dogleg', 'trust-ncg', 'Newton-CG'}, default: 'dogleg'
+        Type of solver.
+    tol : float, default: 1e-8
+        Tolerance for termination.
+    options : dict, optional
+        A dictionary of solver options. All methods accept the following generic options:
+            maxiter : int
+                Maximum number of iterations to perform.
+            disp : bool
+                Set to True to print convergence messages.
+        For method-specific options, see the document for scipy.optimize.minimize.
+    trimming : bool
+        Whether to trim the model.
+    backend : str, {'numpy', 'cupy'}, default: 'numpy'
+        Where CGA computes the gradient over all the regressors to choose the next one. 'cupy' keeps a single
+        precision copy of X on the GPU; the estimation on the chosen regressors always runs on the CPU.
+
+    Returns
+    -------
+    ### IMPORTANT: the return result will separate intercept and coefficients, and will correct the index of
+        returns, regressors and final model if fit_itercept is True ###
+    intercept : nd-array, shape (1,),
+        0 if fit_intercept is True.
+    coef : nd-array, shape (iter_cga,)
+        The coefficients of all regressors.
+    model_trim : nd-array, shape (???,)
+        The final model.
+    loss : float
+        The negative maximized value of the likelihood function of final model.
+    beta_cga : nd-array, shape (n_features + fit_intercept, iter_cga)
+        the estimated coefficient in each iteration where iter_cga is the total number of iterations.
+    path_cga : nd-array, shape (iter_cga,)
+        The sequentially chosen regressors in each iteration.
+    hdic_cga : nd-array, shape (iter_cga,)
+        The computed value of chosen information criterion in each iteration.
+    iter_cga : int
+        The total number of iterations of CGA.
+    """
+    # Check the shape of X and y
+    X = check_array(X)
+
+    # CGA
+    (beta_cga, path_cga, iter_cga, loss_path_cga) = _cga_path(X, y, fit_intercept, kn, method, tol, options,
+                                                              backend)
+
+    # HDIC and Trim
+    return _hdic_trim(X, y, beta_cga, path_cga, iter_cga, loss_path_cga, ic, wn, fit_intercept, method, tol,
+                      options, trimming)
+
+
 class HighDimensionalLogisticRegression(BaseEstimator, LinearClassifierMixin):
     """The High-dimensional Logistic Regression.
     Parameters
@@ -385,6 +652,9 @@ class HighDimensionalLogisticRegression(BaseEstimator, LinearClassifierMixin):
             disp : bool
                 Set to True to print convergence messages.
         For method-specific options, see the document for scipy.optimize.minimize.
+    backend : str, {'numpy', 'cupy'}, default: 'numpy'
+        Where CGA computes the gradient over all the regressors to choose the next one. 'cupy' keeps a single
+        precision copy of X on the GPU; the estimation on the chosen regressors always runs on the CPU.
 
     Attributes
     -------
@@ -411,7 +681,7 @@ class HighDimensionalLogisticRegression(BaseEstimator, LinearClassifierMixin):
     """
 
     def __init__(self, ic='HQIC', wn=1.0, fit_intercept=True, kn=1.0, method='dogleg', tol=1e-8,
-                 options=None, trimming=True):
+                 options=None, trimming=True, backend='numpy'):
         self.ic = ic
         self.wn = wn
         self.fit_intercept = fit_intercept
@@ -420,6 +690,7 @@ class HighDimensionalLogisticRegression(BaseEstimator, LinearClassifierMixin):
         self.tol = tol
         self.trimming = trimming
         self.options = options
+        self.backend = backend
 
     def fit(self, X, y):
         """Fit the model according to the given training data.
@@ -439,7 +710,8 @@ class HighDimensionalLogisticRegression(BaseEstimator, LinearClassifierMixin):
         self.classes_ = np.unique(y)
         (self.intercept_, self.coef_, self.model_trim, self.loss_, self.path_cga_, self.intercept_cga_, self.coef_cga_,
          self.hdic_cga_, self.iter_cga_) = _cga_hdic_trim(X, y, self.ic, self.wn, self.fit_intercept, self.kn,
-                                                          self.method, self.tol, self.options, self.trimming)
+                                                          self.method, self.tol, self.options, self.trimming,
+                                                          self.backend)
 
         return self
 
@@ -455,13 +727,7 @@ class HighDimensionalLogisticRegression(BaseEstimator, LinearClassifierMixin):
         """
         check_is_fitted(self, ['model_trim'])
         X = check_array(X)
-        n = X.shape[0]
-        if self.fit_intercept:
-            X = np.c_[np.ones([n, 1]), X]
-            beta_hat = np.c_[self.intercept_, self.coef_]
-            P = logistic(X, beta_hat.T).ravel()
-        else:
-            P = logistic(X, self.coef_.T).ravel()
+        P = expit(X @ self.coef_.ravel() + self.intercept_)
         return P
 
 